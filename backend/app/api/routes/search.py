@@ -86,30 +86,32 @@ async def search_video(
 @router.get(
     "/search/cache/stats",
     summary="Get cache statistics",
-    description="Returns statistics about the transcript and embedding cache.",
+    description="Returns statistics about the embedding and transcript caches.",
 )
 async def cache_stats(
     search_service: SearchService = Depends(get_search_service),
 ):
     """Get cache statistics."""
     return {
-        "transcripts_cached": len(search_service._transcript_cache),
-        "embeddings_cached": len(search_service._embedding_cache),
-        "video_ids": list(search_service._transcript_cache.keys()),
+        "embeddings_cached": search_service._embedding_cache.currsize,
+        "transcripts_cached": search_service.transcript_service._default_lang_cache.currsize,
+        "max_size": search_service._embedding_cache.maxsize,
+        "ttl_seconds": search_service._embedding_cache.ttl,
+        "video_ids": list(search_service._embedding_cache.keys()),
     }
 
 
 @router.delete(
     "/search/cache",
     summary="Clear cache",
-    description="Clear the transcript and embedding cache.",
+    description="Clear the transcript, embedding and search response caches.",
 )
 async def clear_cache(
     video_id: str = None,
     search_service: SearchService = Depends(get_search_service),
 ):
     """Clear the cache."""
-    search_service.clear_cache(video_id)
+    await search_service.clear_cache(video_id)
     return {
         "success": True,
         "message": f"Cache cleared for {video_id}" if video_id else "All cache cleared",
@@ -3,7 +3,7 @@ Configuration settings for ClipContext API.
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -16,6 +16,7 @@ class Settings(BaseSettings):
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
+    api_workers: Optional[int] = None  # defaults to 2 x CPU count
     
     # CORS
     cors_origins: List[str] = ["http://localhost:3000", "http://localhost:8000",    "https://clipcontext.fly.dev"]
@@ -25,14 +26,29 @@ class Settings(BaseSettings):
     
     # Redis
     redis_url: str = "redis://localhost:6379"
+    redis_enabled: bool = True
+    redis_cache_ttl: int = 7 * 24 * 3600  # seconds
+    semantic_cache_threshold: float = 0.1  # max cosine distance to reuse a response
+    semantic_cache_max_entries: int = 256  # cached responses per video
+    
+    # In-process cache (per worker)
+    memory_cache_maxsize: int = 500  # videos
+    memory_cache_ttl: int = 86400  # seconds
     
     # Embedding model
     embedding_model: str = "all-MiniLM-L6-v2"  # Fast and good quality
+    embedding_max_seq_length: int = 128  # tokens; the model was trained on 128
+    embedding_max_batch: int = 32  # queries encoded per model call
+    embedding_batch_window_ms: float = 5.0  # wait for more queries to batch
+    embedding_workers: Optional[int] = None  # encode threads, defaults to CPU count
+    onnx_model_dir: Optional[str] = None  # quantized ONNX export; uses PyTorch if unset
     
     # Search settings
     chunk_size: int = 100  # words per chunk
     chunk_overlap: int = 20  # words overlap between chunks
     max_results: int = 5
+    prefilter_min_chunks: int = 512  # prefilter transcripts with more chunks (~4h of speech)
+    prefilter_candidates: int = 256  # chunks kept for dense scoring
     
     # Rate limiting
     rate_limit_requests: int = 10
@@ -3,12 +3,15 @@ ClipContext API
 Find any topic in any YouTube video instantly.
 """
 
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.routes import search, health
 from app.config import settings
+from app.services.search import SearchService
 
 
 @asynccontextmanager
@@ -18,12 +21,16 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting ClipContext API...")
     print(f"📦 Environment: {settings.environment}")
     
-    # TODO: Initialize embedding model here
+    # Load and warm up the model so the first request doesn't pay for it
+    search_service = SearchService()
+    search_service.warmup()
+    app.state.search_service = search_service
     
     yield
     
     # Shutdown
     print("👋 Shutting down ClipContext API...")
+    await search_service.close()
 
 
 app = FastAPI(
@@ -31,6 +38,7 @@ app = FastAPI(
     description="Find any topic in any YouTube video instantly.",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -61,3 +69,16 @@ async def root():
         "docs": "/docs",
         "health": "/health",
     }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    uvicorn.run(
+        "app.main:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        loop="uvloop",
+        http="httptools",
+        workers=settings.api_workers or 2 * os.cpu_count(),
+    )
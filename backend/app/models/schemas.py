@@ -12,6 +12,7 @@ class SearchRequest(BaseModel):
     
     youtube_url: str = Field(
         ...,
+        max_length=2048,
         description="YouTube video URL",
         examples=["https://www.youtube.com/watch?v=dQw4w9WgXcQ"]
     )
@@ -1,13 +1,28 @@
-from app.services.transcript import TranscriptService, Transcript, TranscriptError
-from app.services.embedding import EmbeddingService, TextChunker
-from app.services.search import SearchService, get_search_service
-
-__all__ = [
-    "TranscriptService",
-    "Transcript", 
-    "TranscriptError",
-    "EmbeddingService",
-    "TextChunker",
-    "SearchService",
-    "get_search_service",
-]
+# Re-exports are resolved on first access, so importing one service
+# module (e.g. transcript for its URL helpers) doesn't pull in the rest,
+# such as numba for scoring or redis for the cache
+from importlib import import_module
+
+_EXPORTS = {
+    "TranscriptService": "app.services.transcript",
+    "Transcript": "app.services.transcript",
+    "TranscriptError": "app.services.transcript",
+    "EmbeddingService": "app.services.embedding",
+    "BatchedEmbedder": "app.services.embedding",
+    "TextChunker": "app.services.embedding",
+    "RedisCache": "app.services.cache",
+    "SearchService": "app.services.search",
+    "get_search_service": "app.services.search",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = list(_EXPORTS)
@@ -0,0 +1,222 @@
+"""
+Redis cache for chunk embeddings and search responses.
+
+Shared across workers and restarts. Every operation degrades to a cache
+miss when Redis is unreachable, so the API keeps working without it.
+"""
+
+import json
+import time
+from typing import Optional, Tuple
+import numpy as np
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.services.embedding import EmbeddedChunkTable, QuantizedEmbeddings
+from app.services.lexical import SIGNATURE_WORDS
+
+
+KEY_PREFIX = "clipcontext:"
+
+# How long to stop talking to Redis after a connection failure
+RETRY_AFTER_SECONDS = 30.0
+
+
+def _load_array(data: bytes, dtype) -> np.ndarray:
+    """Read-only view of a raw array blob, without copying."""
+    array = np.frombuffer(data, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+class RedisCache:
+    """
+    Redis-backed cache with two kinds of entries:
+
+    - ``embeds:{video_id}``: hash of the embedded chunk table columns
+    - ``queries:{video_id}:{max_results}`` / ``responses:...``: semantic
+      cache of search responses keyed by query embedding
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        ttl: Optional[int] = None,
+        semantic_threshold: Optional[float] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            url: Redis connection URL. Defaults to config setting.
+            ttl: Entry lifetime in seconds. Defaults to config setting.
+            semantic_threshold: Maximum cosine distance between two queries
+                               for them to share a cached response
+        """
+        self.url = url or settings.redis_url
+        self.ttl = ttl or settings.redis_cache_ttl
+        if semantic_threshold is None:
+            semantic_threshold = settings.semantic_cache_threshold
+        self.semantic_threshold = semantic_threshold
+        self.enabled = settings.redis_enabled
+        self._client: Optional[redis.Redis] = None
+        self._retry_at = 0.0
+
+    @property
+    def client(self) -> redis.Redis:
+        """Lazily create the connection pool."""
+        if self._client is None:
+            self._client = redis.from_url(
+                self.url,
+                socket_connect_timeout=1.0,
+                socket_timeout=1.0,
+            )
+        return self._client
+
+    @property
+    def available(self) -> bool:
+        """Whether cache operations should be attempted."""
+        return self.enabled and time.monotonic() >= self._retry_at
+
+    def _on_error(self, error: Exception):
+        print(f"⚠️ Redis cache unavailable: {error}")
+        self._retry_at = time.monotonic() + RETRY_AFTER_SECONDS
+
+    async def get_embeddings(self, video_id: str) -> Optional[EmbeddedChunkTable]:
+        """Get cached chunk embeddings, or None on miss."""
+        if not self.available:
+            return None
+        try:
+            data = await self.client.hgetall(f"{KEY_PREFIX}embeds:{video_id}")
+        except RedisError as e:
+            self._on_error(e)
+            return None
+        # Entries written in an older layout are treated as misses
+        if not data or b"embeddings" not in data:
+            return None
+
+        return EmbeddedChunkTable(
+            embeddings=QuantizedEmbeddings.from_bytes(data[b"embeddings"]),
+            starts=_load_array(data[b"starts"], np.float64),
+            ends=_load_array(data[b"ends"], np.float64),
+            texts=json.loads(data[b"texts"]),
+            signatures=(
+                _load_array(data[b"signatures"], np.uint64).reshape(-1, SIGNATURE_WORDS)
+                if b"signatures" in data else None
+            ),
+        )
+
+    async def set_embeddings(self, video_id: str, chunk_table: EmbeddedChunkTable):
+        """Cache the embedded chunk table of a video."""
+        if not self.available:
+            return
+        key = f"{KEY_PREFIX}embeds:{video_id}"
+        mapping = {
+            "texts": json.dumps(chunk_table.texts),
+            "starts": chunk_table.starts.astype(np.float64).tobytes(),
+            "ends": chunk_table.ends.astype(np.float64).tobytes(),
+            "embeddings": chunk_table.embeddings.to_bytes(),
+        }
+        if chunk_table.signatures is not None:
+            mapping["signatures"] = chunk_table.signatures.astype(np.uint64).tobytes()
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                # Replace the whole hash so no stale signatures survive
+                pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            self._on_error(e)
+
+    async def get_response(
+        self,
+        video_id: str,
+        max_results: int,
+        query_embedding: np.ndarray,
+    ) -> Optional[str]:
+        """
+        Find a cached search response for a semantically similar query.
+
+        Args:
+            video_id: Video that was searched
+            max_results: Result limit of the search
+            query_embedding: Embedding of the new query
+
+        Returns:
+            Response JSON of the closest cached query within the distance
+            threshold, or None
+        """
+        if not self.available:
+            return None
+        queries_key, responses_key = self._response_keys(video_id, max_results)
+        try:
+            data = await self.client.get(queries_key)
+            if not data:
+                return None
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            query = query / np.linalg.norm(query)
+            if len(data) % (query.size * 4):
+                return None
+            cached_queries = np.frombuffer(data, dtype=np.float32).reshape(-1, query.size)
+            similarities = cached_queries @ query
+            best = int(np.argmax(similarities))
+            if 1.0 - similarities[best] > self.semantic_threshold:
+                return None
+
+            return await self.client.lindex(responses_key, best)
+        except RedisError as e:
+            self._on_error(e)
+            return None
+
+    async def set_response(
+        self,
+        video_id: str,
+        max_results: int,
+        query_embedding: np.ndarray,
+        response_json: str,
+    ):
+        """Cache a search response under its query embedding."""
+        if not self.available:
+            return
+        queries_key, responses_key = self._response_keys(video_id, max_results)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / np.linalg.norm(query)
+        try:
+            if await self.client.llen(responses_key) >= settings.semantic_cache_max_entries:
+                return
+            # Query vectors and responses are appended together so the
+            # row index of a vector is the list index of its response
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.append(queries_key, query.tobytes())
+                pipe.rpush(responses_key, response_json)
+                pipe.expire(queries_key, self.ttl)
+                pipe.expire(responses_key, self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            self._on_error(e)
+
+    async def clear(self, video_id: Optional[str] = None):
+        """Remove cached entries for one video, or all entries."""
+        if not self.available:
+            return
+        pattern = f"{KEY_PREFIX}*:{video_id}*" if video_id else f"{KEY_PREFIX}*"
+        try:
+            keys = [key async for key in self.client.scan_iter(match=pattern)]
+            if keys:
+                await self.client.delete(*keys)
+        except RedisError as e:
+            self._on_error(e)
+
+    async def close(self):
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _response_keys(video_id: str, max_results: int) -> Tuple[str, str]:
+        suffix = f"{video_id}:{max_results}"
+        return f"{KEY_PREFIX}queries:{suffix}", f"{KEY_PREFIX}responses:{suffix}"
@@ -1,15 +1,29 @@
 """
-Text embedding service using sentence-transformers.
+Text embedding service using sentence-transformers (or ONNX Runtime).
 """
 
-from typing import List, Optional
+import asyncio
+import os
+import struct
+from collections import deque
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
 import numpy as np
 from dataclasses import dataclass
 
 from app.config import settings
+from app.services.lexical import token_signatures
 
 
-@dataclass
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    """Yield successive lists of up to ``size`` items."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@dataclass(slots=True)
 class TextChunk:
     """A chunk of text with metadata for embedding."""
     text: str
@@ -18,11 +32,113 @@ class TextChunk:
     chunk_index: int
 
 
-@dataclass  
-class EmbeddedChunk:
-    """A text chunk with its embedding vector."""
-    chunk: TextChunk
-    embedding: np.ndarray
+@dataclass(slots=True)
+class QuantizedEmbeddings:
+    """
+    Embedding matrix stored as symmetric per-row int8 values.
+    
+    Each row is reconstructed as ``values[i] * scales[i]``. Scoring reads
+    a quarter of the bytes of the float32 matrix.
+    """
+    values: np.ndarray  # int8, shape [N, D]
+    scales: np.ndarray  # float32, shape [N]
+    
+    # Rows converted back to float32 per scoring step; keeps the
+    # temporary small enough to stay in cache.
+    block_rows = 1024
+    
+    # Serialized layout: N and D as uint32, then N float32 scales, then the
+    # N x D int8 values
+    _header = struct.Struct("II")
+    
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> "QuantizedEmbeddings":
+        """Quantize a float matrix of shape [N, D] to int8 with one scale per row."""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        scales = np.max(np.abs(matrix), axis=1, initial=0.0) / 127
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        values = np.round(matrix / scales[:, None]).astype(np.int8)
+        return cls(values=values, scales=scales)
+    
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "QuantizedEmbeddings":
+        """
+        Load embeddings written by ``to_bytes`` without copying.
+        
+        The arrays are read-only views into ``blob``.
+        """
+        n_rows, dim = cls._header.unpack_from(blob)
+        view = memoryview(blob)[cls._header.size:]
+        scales = np.frombuffer(view, dtype=np.float32, count=n_rows)
+        values = np.frombuffer(
+            view, dtype=np.int8, count=n_rows * dim, offset=scales.nbytes
+        ).reshape(n_rows, dim)
+        scales.setflags(write=False)
+        values.setflags(write=False)
+        return cls(values=values, scales=scales)
+    
+    def to_bytes(self) -> bytes:
+        """Serialize to one contiguous blob."""
+        n_rows, dim = self.values.shape
+        return b"".join((
+            self._header.pack(n_rows, dim),
+            np.ascontiguousarray(self.scales, dtype=np.float32).tobytes(),
+            np.ascontiguousarray(self.values, dtype=np.int8).tobytes(),
+        ))
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def dot(self, query: np.ndarray) -> np.ndarray:
+        """
+        Compute the dot product of every stored row with a float32 query.
+        
+        Args:
+            query: Query vector of shape [D]
+            
+        Returns:
+            float32 array of shape [N]
+        """
+        query = np.asarray(query, dtype=np.float32)
+        n_rows = len(self.values)
+        scores = np.empty(n_rows, dtype=np.float32)
+        
+        # Upcast each block into one reused buffer; the float32
+        # matrix-vector product then goes straight to BLAS sgemv
+        block = np.empty((min(self.block_rows, n_rows), self.values.shape[1]), dtype=np.float32)
+        for lo in range(0, n_rows, self.block_rows):
+            hi = min(lo + self.block_rows, n_rows)
+            rows = block[:hi - lo]
+            np.copyto(rows, self.values[lo:hi], casting="unsafe")
+            np.matmul(rows, query, out=scores[lo:hi])
+        scores *= self.scales
+        return scores
+
+
+@dataclass(slots=True)
+class EmbeddedChunkTable:
+    """
+    Embedded chunks of one transcript, stored column-wise.
+    
+    Row i of every column describes chunk i, so search can score the whole
+    embedding matrix and then index the metadata columns.
+    """
+    embeddings: QuantizedEmbeddings
+    starts: np.ndarray  # float64, chunk start times in seconds
+    ends: np.ndarray  # float64, chunk end times in seconds
+    texts: List[str]
+    # uint64 word signatures for the lexical prefilter. Only tables long
+    # enough to be prefiltered get them at index time; see word_signatures
+    signatures: Optional[np.ndarray] = None
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def word_signatures(self) -> np.ndarray:
+        """Get the word signatures, building them on first use if needed."""
+        if self.signatures is None:
+            self.signatures = token_signatures(self.texts)
+        return self.signatures
 
 
 class EmbeddingService:
@@ -43,9 +159,17 @@ class EmbeddingService:
     def model(self):
         """Lazy load the model."""
         if self._model is None:
-            from sentence_transformers import SentenceTransformer
-            print(f"📥 Loading embedding model: {self.model_name}")
-            self._model = SentenceTransformer(self.model_name)
+            if settings.onnx_model_dir:
+                from app.services.onnx_encoder import OnnxEncoder
+                print(f"📥 Loading ONNX embedding model: {settings.onnx_model_dir}")
+                self._model = OnnxEncoder(settings.onnx_model_dir)
+            else:
+                from sentence_transformers import SentenceTransformer
+                print(f"📥 Loading embedding model: {self.model_name}")
+                self._model = SentenceTransformer(self.model_name)
+            # Attention cost grows quadratically with sequence length;
+            # cap it at what the model was trained on
+            self._model.max_seq_length = settings.embedding_max_seq_length
             print(f"✅ Model loaded successfully")
         return self._model
     
@@ -61,35 +185,147 @@ class EmbeddingService:
         """
         return self.model.encode(text, convert_to_numpy=True)
     
-    def embed_texts(self, texts: List[str]) -> np.ndarray:
+    def embed_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
         """
         Generate embeddings for multiple texts.
         
         Args:
             texts: List of texts to embed
+            batch_size: Number of texts per model forward pass
             
         Returns:
             Array of embedding vectors
         """
-        return self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
     
-    def embed_chunks(self, chunks: List[TextChunk]) -> List[EmbeddedChunk]:
+    def embed_chunks(
+        self,
+        chunks: Iterable[TextChunk],
+        batch_size: int = 64,
+    ) -> EmbeddedChunkTable:
         """
         Generate embeddings for text chunks.
         
+        The embeddings are L2-normalized and quantized to int8 once here,
+        so similarity search only has to normalize the query. Chunks are
+        consumed and encoded batch by batch, so only one batch of float32
+        embeddings exists at a time.
+        
+        Args:
+            chunks: TextChunk objects, e.g. from TextChunker.iter_chunks
+            batch_size: Number of chunks per encode call
+            
+        Returns:
+            EmbeddedChunkTable with one row per chunk
+        """
+        return self._concat_blocks([
+            self._index_chunks(batch, batch_size)
+            for batch in _batched(chunks, batch_size)
+        ])
+    
+    async def embed_chunks_async(
+        self,
+        chunks: Iterable[TextChunk],
+        batch_size: int = 64,
+        executor: Optional[Executor] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> EmbeddedChunkTable:
+        """
+        Generate embeddings for text chunks, encoding batches in parallel.
+        
+        Same result as embed_chunks. Chunks are consumed as encode slots
+        free up, so at most max_in_flight batches of chunks and float32
+        embeddings exist at a time.
+        
         Args:
-            chunks: List of TextChunk objects
+            chunks: TextChunk objects, e.g. from TextChunker.iter_chunks
+            batch_size: Number of chunks per encode call
+            executor: Executor that runs the blocking encode calls.
+                     Defaults to the event loop's default executor.
+            max_in_flight: Most batches submitted at once. Defaults to the
+                          embedding_workers setting or the CPU count.
             
         Returns:
-            List of EmbeddedChunk objects with embeddings
+            EmbeddedChunkTable with one row per chunk
         """
+        loop = asyncio.get_running_loop()
+        window = max_in_flight or settings.embedding_workers or os.cpu_count() or 1
+        blocks: List[EmbeddedChunkTable] = []
+        pending: deque = deque()
+        try:
+            for batch in _batched(chunks, batch_size):
+                if len(pending) >= window:
+                    blocks.append(await pending.popleft())
+                pending.append(
+                    loop.run_in_executor(executor, self._index_chunks, batch, batch_size)
+                )
+            while pending:
+                blocks.append(await pending.popleft())
+        finally:
+            # Don't leave queued batches running for a cancelled request
+            for future in pending:
+                future.cancel()
+        return self._concat_blocks(blocks)
+    
+    def _index_chunks(
+        self,
+        chunks: List[TextChunk],
+        batch_size: int,
+    ) -> EmbeddedChunkTable:
+        """Encode, L2-normalize and quantize one batch of chunks into a table."""
         texts = [chunk.text for chunk in chunks]
-        embeddings = self.embed_texts(texts)
+        matrix = np.asarray(self.embed_texts(texts, batch_size), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
         
-        return [
-            EmbeddedChunk(chunk=chunk, embedding=embedding)
-            for chunk, embedding in zip(chunks, embeddings)
-        ]
+        return EmbeddedChunkTable(
+            embeddings=QuantizedEmbeddings.from_matrix(matrix),
+            starts=np.fromiter(
+                (chunk.start_time for chunk in chunks), dtype=np.float64, count=len(chunks)
+            ),
+            ends=np.fromiter(
+                (chunk.end_time for chunk in chunks), dtype=np.float64, count=len(chunks)
+            ),
+            texts=texts,
+        )
+    
+    def _concat_blocks(self, blocks: List[EmbeddedChunkTable]) -> EmbeddedChunkTable:
+        """
+        Join per-batch tables; quantization is per row, so this is exact.
+        
+        Word signatures are only built for tables the prefilter will run on.
+        """
+        if not blocks:
+            return EmbeddedChunkTable(
+                embeddings=QuantizedEmbeddings(
+                    values=np.empty((0, self.embedding_dimension), dtype=np.int8),
+                    scales=np.empty(0, dtype=np.float32),
+                ),
+                starts=np.empty(0, dtype=np.float64),
+                ends=np.empty(0, dtype=np.float64),
+                texts=[],
+            )
+        if len(blocks) == 1:
+            table = blocks[0]
+        else:
+            table = EmbeddedChunkTable(
+                embeddings=QuantizedEmbeddings(
+                    values=np.concatenate([block.embeddings.values for block in blocks]),
+                    scales=np.concatenate([block.embeddings.scales for block in blocks]),
+                ),
+                starts=np.concatenate([block.starts for block in blocks]),
+                ends=np.concatenate([block.ends for block in blocks]),
+                texts=[text for block in blocks for text in block.texts],
+            )
+        
+        if len(table) > settings.prefilter_min_chunks:
+            table.signatures = token_signatures(table.texts)
+        return table
     
     @property
     def embedding_dimension(self) -> int:
@@ -98,6 +334,101 @@ class EmbeddingService:
         return self.model.get_sentence_embedding_dimension()
 
 
+class BatchedEmbedder:
+    """
+    Coalesces concurrent single-text embedding requests into one model call.
+    
+    Texts arriving within a short window are encoded together, so the
+    model runs one batch instead of many batches of one.
+    """
+    
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        max_batch: int = None,
+        batch_window_ms: float = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            embedding_service: Service used to encode each batch
+            max_batch: Maximum number of texts per model call
+            batch_window_ms: How long to wait for more texts after the
+                            first one arrives
+            executor: Executor that runs the blocking encode calls.
+                     Defaults to the event loop's default executor.
+        """
+        self.embedding_service = embedding_service
+        self.executor = executor
+        self.max_batch = max_batch or settings.embedding_max_batch
+        if batch_window_ms is None:
+            batch_window_ms = settings.embedding_batch_window_ms
+        self.batch_window = batch_window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text as part of a shared batch.
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector as numpy array
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def close(self):
+        """Stop the background batching task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+    
+    async def _run(self):
+        """Collect queued texts into batches and encode them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(
+                    self.executor, self.embedding_service.embed_texts, texts
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+
 class TextChunker:
     """Utility for chunking transcript text."""
     
@@ -132,47 +463,95 @@ class TextChunker:
         Returns:
             List of TextChunk objects
         """
-        if not segments:
-            return []
-        
-        chunks = []
-        current_words = []
-        current_start = segments[0].start
-        segment_idx = 0
-        word_to_time = []  # Track which time each word belongs to
-        
-        # Build word-to-time mapping
-        for segment in segments:
-            words = segment.text.split()
-            word_duration = segment.duration / max(len(words), 1)
-            
-            for i, word in enumerate(words):
-                word_time = segment.start + (i * word_duration)
-                word_to_time.append((word, word_time, segment.start + segment.duration))
-        
-        # Create chunks with overlap
-        i = 0
-        chunk_index = 0
-        
-        while i < len(word_to_time):
-            # Get chunk_size words
-            chunk_end = min(i + self.chunk_size, len(word_to_time))
-            chunk_words = word_to_time[i:chunk_end]
+        return list(self.iter_chunks(segments))
+    
+    def iter_chunks(
+        self,
+        segments: List['TranscriptSegment']
+    ) -> Iterator[TextChunk]:
+        """
+        Lazily chunk transcript segments; see chunk_transcript.
+        
+        Chunk texts are joined only as they are consumed, so feeding this
+        straight into EmbeddingService.embed_chunks never holds every
+        chunk at once.
+        
+        Args:
+            segments: List of TranscriptSegment objects
             
-            if chunk_words:
-                text = " ".join(w[0] for w in chunk_words)
-                start_time = chunk_words[0][1]
-                end_time = chunk_words[-1][2]
-                
-                chunks.append(TextChunk(
-                    text=text,
-                    start_time=start_time,
-                    end_time=end_time,
-                    chunk_index=chunk_index,
-                ))
-                chunk_index += 1
+        Yields:
+            TextChunk objects in transcript order
+        """
+        if not segments:
+            return
+        yield from self.iter_column_chunks(
+            [segment.text for segment in segments],
+            np.fromiter(
+                (segment.start for segment in segments), dtype=np.float64, count=len(segments)
+            ),
+            np.fromiter(
+                (segment.duration for segment in segments), dtype=np.float64, count=len(segments)
+            ),
+        )
+    
+    def iter_column_chunks(
+        self,
+        texts: List[str],
+        starts: np.ndarray,
+        durations: np.ndarray
+    ) -> Iterator[TextChunk]:
+        """
+        Lazily chunk a transcript given as columns, as Transcript stores it.
+        
+        Args:
+            texts: Segment texts
+            starts: Segment start times in seconds
+            durations: Segment durations in seconds
             
-            # Move forward by (chunk_size - overlap)
-            i += max(self.chunk_size - self.chunk_overlap, 1)
+        Yields:
+            TextChunk objects in transcript order
+        """
+        # Split every segment once; words are kept as a flat list so the
+        # chunk windows below can be joined straight from list slices.
+        split_texts = [text.split() for text in texts]
+        words = [word for segment_words in split_texts for word in segment_words]
+        n_words = len(words)
+        if n_words == 0:
+            return
+        
+        # Build per-word timing arrays in a few vectorized passes.
+        # Each word gets an evenly spaced start time within its segment,
+        # and the end time of the segment it belongs to.
+        words_per_seg = np.fromiter(
+            (len(segment_words) for segment_words in split_texts),
+            dtype=np.int64,
+            count=len(split_texts),
+        )
+        segment_starts = np.asarray(starts, dtype=np.float64)
+        segment_durs = np.asarray(durations, dtype=np.float64)
+        word_durs = segment_durs / np.maximum(words_per_seg, 1)
+        word_offsets = np.arange(n_words) - np.repeat(
+            np.cumsum(words_per_seg) - words_per_seg, words_per_seg
+        )
+        word_starts = (
+            np.repeat(segment_starts, words_per_seg)
+            + word_offsets * np.repeat(word_durs, words_per_seg)
+        )
+        word_ends = np.repeat(segment_starts + segment_durs, words_per_seg)
+        
+        # Create chunks with overlap, moving forward by (chunk_size - overlap)
+        stride = max(self.chunk_size - self.chunk_overlap, 1)
+        chunk_starts = np.arange(0, n_words, stride)
+        chunk_ends = np.minimum(chunk_starts + self.chunk_size, n_words)
+        start_times = word_starts[chunk_starts].tolist()
+        end_times = word_ends[chunk_ends - 1].tolist()
         
-        return chunks
+        for chunk_index, (lo, hi) in enumerate(
+            zip(chunk_starts.tolist(), chunk_ends.tolist())
+        ):
+            yield TextChunk(
+                text=" ".join(words[lo:hi]),
+                start_time=start_times[chunk_index],
+                end_time=end_times[chunk_index],
+                chunk_index=chunk_index,
+            )
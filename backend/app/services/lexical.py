@@ -0,0 +1,93 @@
+"""
+Lexical prefilter for long transcripts.
+
+Each chunk gets a 1024-bit signature with one bit set per (crudely stemmed)
+word. A query is matched against all signatures with a few vectorized
+bitwise ops, so dense scoring only has to run on chunks that share words
+with the query.
+"""
+
+import re
+import zlib
+from typing import List, Optional
+import numpy as np
+
+
+SIGNATURE_BITS = 1024
+SIGNATURE_WORDS = SIGNATURE_BITS // 64
+
+# Tokens are cut to this many characters as a cheap stand-in for stemming
+STEM_LENGTH = 6
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_STOPWORDS = frozenset({
+    "the", "and", "for", "that", "this", "with", "you", "are", "was", "were",
+    "but", "not", "have", "has", "had", "they", "she", "his", "her", "its",
+    "from", "what", "how", "when", "where", "who", "which", "about", "there",
+    "can", "just", "like", "all", "one", "our", "out", "your", "than", "then",
+})
+
+
+def _token_bits(text: str) -> List[int]:
+    """Bit positions of the content words of a text."""
+    return [
+        zlib.crc32(token[:STEM_LENGTH].encode()) % SIGNATURE_BITS
+        for token in _TOKEN_RE.findall(text.lower())
+        if len(token) >= 3 and token not in _STOPWORDS
+    ]
+
+
+def token_signatures(texts: List[str]) -> np.ndarray:
+    """
+    Build the word signature of every text.
+
+    Args:
+        texts: Chunk texts
+
+    Returns:
+        uint64 array of shape [len(texts), SIGNATURE_WORDS]
+    """
+    signatures = np.zeros((len(texts), SIGNATURE_BITS), dtype=bool)
+    for row, text in enumerate(texts):
+        signatures[row, _token_bits(text)] = True
+    # Bit i of word w is set if boolean column w * 64 + i is set
+    return np.packbits(signatures, axis=1, bitorder="little").view(np.uint64)
+
+
+def lexical_candidates(
+    signatures: np.ndarray,
+    query: str,
+    limit: int,
+) -> Optional[np.ndarray]:
+    """
+    Select the chunks sharing the most words with the query.
+
+    Args:
+        signatures: Chunk signatures from token_signatures
+        query: Search query text
+        limit: Number of candidates to keep for dense scoring
+
+    Returns:
+        Sorted row indices of the `limit` best-matching chunks, or None
+        when fewer than `limit` or more than half of the chunks match, in
+        which case every chunk should be scored
+    """
+    bits = np.unique(np.asarray(_token_bits(query), dtype=np.int64))
+    if bits.size == 0:
+        return None
+
+    masks = np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64))
+    hits = (signatures[:, bits // 64] & masks) != 0
+
+    matched = np.flatnonzero(hits.any(axis=1))
+    # With fewer matches than candidates, dense scoring over the matches
+    # alone would drop paraphrased passages elsewhere in the transcript
+    if matched.size < limit or matched.size > len(signatures) // 2:
+        return None
+    if matched.size > limit:
+        # Rank by the summed IDF of the matched words so rare words count most
+        idf = np.log(len(signatures) / np.maximum(hits.sum(axis=0), 1))
+        weights = hits[matched] @ idf
+        matched = matched[np.argpartition(-weights, limit - 1)[:limit]]
+    return np.sort(matched)
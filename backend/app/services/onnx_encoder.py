@@ -0,0 +1,143 @@
+"""
+ONNX Runtime encoder for sentence-transformers models.
+
+A drop-in replacement for the parts of ``SentenceTransformer`` that the
+embedding service uses, running an int8 dynamically quantized export of
+the model on ONNX Runtime instead of PyTorch.
+
+Export the model once (needs ``pip install optimum[onnxruntime]``):
+
+    python -m app.services.onnx_encoder ./onnx_model
+
+then set ``ONNX_MODEL_DIR=./onnx_model``.
+"""
+
+import os
+import sys
+from typing import List, Union
+import numpy as np
+
+
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+class OnnxEncoder:
+    """Mean-pooled, L2-normalized sentence embeddings from an ONNX model."""
+
+    def __init__(self, model_dir: str, max_seq_length: int = 256):
+        """
+        Load the ONNX session and fast tokenizer.
+
+        Args:
+            model_dir: Directory written by ``export_quantized_model``
+            max_seq_length: Maximum number of tokens per text
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, QUANTIZED_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        # Pad each batch only to its longest text
+        self.tokenizer.enable_padding(length=None)
+        self.max_seq_length = max_seq_length
+
+    @property
+    def max_seq_length(self) -> int:
+        return self._max_seq_length
+
+    @max_seq_length.setter
+    def max_seq_length(self, value: int):
+        self._max_seq_length = value
+        self.tokenizer.enable_truncation(max_length=value)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """
+        Encode texts the same way ``SentenceTransformer.encode`` does.
+
+        Args:
+            sentences: A text or list of texts
+            batch_size: Texts per inference call
+            convert_to_numpy: Accepted for compatibility; always NumPy
+            show_progress_bar: Accepted for compatibility; ignored
+
+        Returns:
+            Embedding vector for a single text, or array of vectors
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        embeddings = np.empty((len(sentences), self._dimension), dtype=np.float32)
+        for lo in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(sentences[lo:lo + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.array(
+                    [e.type_ids for e in encodings], dtype=np.int64
+                )
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            # Mean pooling over real (non-padding) tokens, then L2-normalize
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            embeddings[lo:lo + batch_size] = pooled
+
+        return embeddings[0] if single else embeddings
+
+
+def export_quantized_model(model_name: str, output_dir: str):
+    """
+    Export a sentence-transformers model to ONNX with int8 dynamic quantization.
+
+    Args:
+        model_name: Hugging Face model id or sentence-transformers short name
+        output_dir: Directory to write the model and tokenizer to
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    if "/" not in model_name:
+        model_name = f"sentence-transformers/{model_name}"
+
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantizer.quantize(
+        save_dir=output_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(
+            is_static=False, per_channel=False
+        ),
+    )
+
+
+if __name__ == "__main__":
+    from app.config import settings
+
+    export_quantized_model(settings.embedding_model, sys.argv[1])
+    print(f"✅ Exported {settings.embedding_model} to {sys.argv[1]}")
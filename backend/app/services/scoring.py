@@ -0,0 +1,91 @@
+"""
+Cosine similarity + top-k kernel for quantized chunk embeddings.
+
+Uses a Numba-compiled kernel when numba is installed, and NumPy otherwise.
+"""
+
+from typing import Tuple
+import numpy as np
+
+from app.services.embedding import QuantizedEmbeddings
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _cosine_topk_numba(values, scales, query, k):
+        n, d = values.shape
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            acc = np.float32(0.0)
+            for j in range(d):
+                acc += values[i, j] * query[j]
+            scores[i] = acc * scales[i]
+
+        # Keep the k best seen so far, sorted descending; k is small
+        top_indices = np.full(k, -1, dtype=np.int64)
+        top_scores = np.full(k, -np.inf, dtype=np.float32)
+        for i in range(n):
+            score = scores[i]
+            if score > top_scores[k - 1]:
+                pos = k - 1
+                while pos > 0 and top_scores[pos - 1] < score:
+                    top_scores[pos] = top_scores[pos - 1]
+                    top_indices[pos] = top_indices[pos - 1]
+                    pos -= 1
+                top_scores[pos] = score
+                top_indices[pos] = i
+        return top_indices, top_scores
+
+
+def _cosine_topk_numpy(
+    embeddings: QuantizedEmbeddings,
+    query: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    scores = embeddings.dot(query)
+    top_indices = np.argpartition(-scores, k - 1)[:k]
+    top_indices = top_indices[np.argsort(-scores[top_indices])]
+    return top_indices, scores[top_indices]
+
+
+def cosine_topk(
+    embeddings: QuantizedEmbeddings,
+    query: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k rows with the highest dot product with the query.
+
+    For L2-normalized rows and query this is cosine similarity.
+
+    Args:
+        embeddings: Quantized embeddings to score
+        query: float32 query vector of shape [D]
+        k: Number of rows to return; must not exceed len(embeddings)
+
+    Returns:
+        Tuple of (row indices, scores), sorted by score descending
+    """
+    query = np.ascontiguousarray(query, dtype=np.float32)
+    if njit is not None:
+        return _cosine_topk_numba(
+            np.ascontiguousarray(embeddings.values), embeddings.scales, query, k
+        )
+    return _cosine_topk_numpy(embeddings, query, k)
+
+
+def warmup_cosine_topk(dimension: int = 384):
+    """Compile the kernel (or load it from cache) before the first request."""
+    if njit is not None:
+        embeddings = QuantizedEmbeddings.from_matrix(
+            np.ones((2, dimension), dtype=np.float32)
+        )
+        query = np.ones(dimension, dtype=np.float32)
+        cosine_topk(embeddings, query, 1)
+        # Tables loaded from Redis are read-only, which Numba types separately
+        cosine_topk(QuantizedEmbeddings.from_bytes(embeddings.to_bytes()), query, 1)
@@ -2,15 +2,33 @@
 Search service - combines transcript fetching, embedding, and similarity search.
 """
 
+import asyncio
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 import numpy as np
 from dataclasses import dataclass
-from types import SimpleNamespace
+from cachetools import TTLCache
+from fastapi import Request
 
 from app.config import settings
-from app.services.transcript import TranscriptService, Transcript, TranscriptError
-from app.services.embedding import EmbeddingService, TextChunker, EmbeddedChunk
+from app.services.transcript import (
+    TranscriptService,
+    Transcript,
+    TranscriptError,
+    close_http_client,
+)
+from app.services.cache import RedisCache
+from app.services.lexical import lexical_candidates
+from app.services.scoring import cosine_topk, warmup_cosine_topk
+from app.services.embedding import (
+    BatchedEmbedder,
+    EmbeddingService,
+    TextChunker,
+    EmbeddedChunkTable,
+    QuantizedEmbeddings,
+)
 from app.models.schemas import (
     SearchRequest,
     SearchResponse,
@@ -19,10 +37,10 @@ from app.models.schemas import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """Internal search result before formatting."""
-    chunk: 'TextChunk'
+    chunk_index: int  # row in the EmbeddedChunkTable
     score: float
 
 
@@ -38,12 +56,26 @@ class SearchService:
     def __init__(self):
         self.transcript_service = TranscriptService()
         self.embedding_service = EmbeddingService()
+        
+        # Model inference is blocking; run it off the event loop on a
+        # bounded pool so concurrent requests don't serialize on it
+        self._encode_pool = ThreadPoolExecutor(
+            max_workers=settings.embedding_workers or os.cpu_count(),
+            thread_name_prefix="encode",
+        )
+        self.batched_embedder = BatchedEmbedder(
+            self.embedding_service, executor=self._encode_pool
+        )
         self.chunker = TextChunker()
         
-        # In-memory cache for development
-        # TODO: Replace with Redis in production
-        self._transcript_cache: dict[str, Transcript] = {}
-        self._embedding_cache: dict[str, List[EmbeddedChunk]] = {}
+        # Redis is shared across workers; the bounded in-process cache keeps
+        # the hot videos of this worker without a network round trip
+        self.cache = RedisCache()
+        self._embedding_cache: TTLCache[str, EmbeddedChunkTable] = TTLCache(
+            maxsize=settings.memory_cache_maxsize, ttl=settings.memory_cache_ttl
+        )
+        # Cache writes that run after the response is returned
+        self._background_tasks: set[asyncio.Task] = set()
     
     async def search(self, request: SearchRequest) -> SearchResponse:
         """
@@ -62,60 +94,89 @@ class SearchService:
         if not video_id:
             raise ValueError(f"Invalid YouTube URL: {request.youtube_url}")
         
-        # Check cache
-        cached = video_id in self._transcript_cache
+        max_results = request.max_results or settings.max_results
         
-        # Get or fetch transcript
-        if cached:
-            transcript = self._transcript_cache[video_id]
-            embedded_chunks = self._embedding_cache[video_id]
-        else:
-            # Fetch transcript
-            # transcript = await self.transcript_service.fetch_transcript(video_id)
-            # passing request.youtube_url instead of video_id
-            transcript_data = await self.transcript_service.fetch_transcript(request.youtube_url)
-            self._transcript_cache[video_id] = transcript_data
+        # Embed the query while the transcript is loaded or fetched
+        query_task = asyncio.create_task(self.batched_embedder.embed(request.query))
+        try:
+            # Get the embedded chunks from this worker's cache, then Redis,
+            # and only fetch and embed the transcript if both miss
+            chunk_table = self._embedding_cache.get(video_id)
+            cached = chunk_table is not None
+            semantic_miss = False
+            if not cached:
+                if self.cache.available:
+                    # Another worker may have answered a semantically
+                    # equivalent query; check that small entry before
+                    # downloading the whole chunk table
+                    cached_json = await self.cache.get_response(
+                        video_id, max_results, await query_task
+                    )
+                    if cached_json is not None:
+                        cached_response = SearchResponse.model_validate_json(cached_json)
+                        return cached_response.model_copy(update={
+                            "query": request.query,
+                            "search_time_ms": round((time.time() - start_time) * 1000, 2),
+                            "cached": True,
+                        })
+                    semantic_miss = True
+                
+                chunk_table = await self.cache.get_embeddings(video_id)
+                cached = chunk_table is not None
+                if not cached:
+                    # Fetch transcript
+                    # transcript = await self.transcript_service.fetch_transcript(video_id)
+                    # passing request.youtube_url instead of video_id
+                    transcript_data = await self.transcript_service.fetch_transcript(request.youtube_url)
+                    
+                    # Chunk and embed
+                    transcript = Transcript.from_dict(transcript_data)
+                    chunk_table = await self.embedding_service.embed_chunks_async(
+                        self.chunker.iter_column_chunks(
+                            transcript.texts, transcript.starts, transcript.durations
+                        ),
+                        executor=self._encode_pool,
+                    )
+                    await self.cache.set_embeddings(video_id, chunk_table)
+                
+                self._embedding_cache[video_id] = chunk_table
             
-            # Chunk and embed
-            segments = [SimpleNamespace(**s) for s in transcript_data["segments"]]
-            chunks = self.chunker.chunk_transcript(segments)
-            embedded_chunks = self.embedding_service.embed_chunks(chunks)
-            self._embedding_cache[video_id] = embedded_chunks
-        
-        # Embed the query
-        query_embedding = self.embedding_service.embed_text(request.query)
+            query_embedding = await query_task
+        finally:
+            if not query_task.done():
+                query_task.cancel()
         
         # Find similar chunks
         results = self._similarity_search(
             query_embedding,
-            embedded_chunks,
-            max_results=request.max_results or settings.max_results
+            chunk_table,
+            max_results=max_results,
+            query=request.query,
         )
         
-        # Format results
-        timestamp_results = [
-            TimestampResult(
-                timestamp_start=result.chunk.start_time,
-                timestamp_end=result.chunk.end_time,
-                timestamp_formatted=self.transcript_service.format_timestamp(
-                    result.chunk.start_time
-                ),
-                text=result.chunk.text,
-                score=float(result.score),
-                youtube_link=self.transcript_service.get_youtube_link_with_timestamp(
+        # Format results. These models are built from our own data, so
+        # skip validation with model_construct; only the request is untrusted
+        timestamp_results = []
+        for result in results:
+            start = float(chunk_table.starts[result.chunk_index])
+            timestamp_results.append(TimestampResult.model_construct(
+                timestamp_start=start,
+                timestamp_end=float(chunk_table.ends[result.chunk_index]),
+                timestamp_formatted=self.transcript_service.format_timestamp(start),
+                text=chunk_table.texts[result.chunk_index],
+                score=result.score,
+                youtube_link=self.transcript_service.get_youtube_link(
                     video_id,
-                    result.chunk.start_time
+                    start
                 ),
-            )
-            for result in results
-        ]
+            ))
         
         search_time_ms = (time.time() - start_time) * 1000
         
-        return SearchResponse(
+        response = SearchResponse.model_construct(
             success=True,
             query=request.query,
-            video=VideoMetadata(
+            video=VideoMetadata.model_construct(
                 video_id=video_id,
                 title=None,  # TODO: Fetch from YouTube API
                 #duration=int(transcript.duration) if transcript.duration else None,
@@ -126,71 +187,112 @@ class SearchService:
             search_time_ms=round(search_time_ms, 2),
             cached=cached,
         )
+        # Only store responses the semantic cache was checked for and did
+        # not have, so repeated queries don't fill it with near-duplicates
+        if semantic_miss:
+            self._run_in_background(self.cache.set_response(
+                video_id, max_results, query_embedding, response.model_dump_json()
+            ))
+        return response
+    
+    def _run_in_background(self, coro):
+        """Run a coroutine without awaiting it, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
     
     def _similarity_search(
         self,
         query_embedding: np.ndarray,
-        embedded_chunks: List[EmbeddedChunk],
-        max_results: int = 5
+        chunk_table: EmbeddedChunkTable,
+        max_results: int = 5,
+        query: Optional[str] = None
     ) -> List[SearchResult]:
         """
         Find chunks most similar to the query using cosine similarity.
         
+        Long transcripts are first narrowed down to the chunks sharing
+        words with the query, when there are enough of them.
+        
         Args:
             query_embedding: Query vector
-            embedded_chunks: List of embedded chunks to search
+            chunk_table: Embedded chunks to search; embeddings are
+                        quantized and L2-normalized
             max_results: Maximum number of results to return
+            query: Query text for the lexical prefilter
             
         Returns:
             List of SearchResult objects sorted by score descending
         """
-        if not embedded_chunks:
+        if not len(chunk_table):
             return []
         
-        # Stack all embeddings into a matrix
-        chunk_embeddings = np.stack([ec.embedding for ec in embedded_chunks])
-        
-        # Compute cosine similarity
-        # Normalize vectors
-        query_norm = query_embedding / np.linalg.norm(query_embedding)
-        chunk_norms = chunk_embeddings / np.linalg.norm(
-            chunk_embeddings, axis=1, keepdims=True
-        )
+        # Chunk rows are already normalized, so the dot product with the
+        # normalized query gives cosine similarity
+        query_norm = (
+            query_embedding / np.linalg.norm(query_embedding)
+        ).astype(np.float32)
         
-        # Dot product gives cosine similarity for normalized vectors
-        similarities = np.dot(chunk_norms, query_norm)
+        embeddings = chunk_table.embeddings
+        candidates = None
+        if query and len(chunk_table) > settings.prefilter_min_chunks:
+            candidates = lexical_candidates(
+                chunk_table.word_signatures(),
+                query,
+                limit=settings.prefilter_candidates,
+            )
+        if candidates is not None:
+            embeddings = QuantizedEmbeddings(
+                values=embeddings.values[candidates],
+                scales=embeddings.scales[candidates],
+            )
         
-        # Get top results
-        top_indices = np.argsort(similarities)[::-1][:max_results]
+        top_indices, top_scores = cosine_topk(
+            embeddings,
+            query_norm,
+            min(max_results, len(embeddings)),
+        )
+        if candidates is not None:
+            top_indices = candidates[top_indices]
         
+        # int8 rounding can push a near-exact match slightly above 1.0,
+        # which TimestampResult.score does not allow
         results = [
-            SearchResult(
-                chunk=embedded_chunks[idx].chunk,
-                score=float(similarities[idx])
-            )
-            for idx in top_indices
-            if similarities[idx] > 0.1  # Filter low-relevance results
+            SearchResult(chunk_index=int(idx), score=min(float(score), 1.0))
+            for idx, score in zip(top_indices, top_scores)
+            if score > 0.1  # Filter low-relevance results
         ]
         
         return results
     
-    def clear_cache(self, video_id: Optional[str] = None):
-        """Clear transcript and embedding cache."""
+    def warmup(self):
+        """Load the embedding model and scoring kernel and warm them up."""
+        self.embedding_service.embed_text("warmup")
+        warmup_cosine_topk(self.embedding_service.embedding_dimension)
+    
+    async def close(self):
+        """Stop background batching and release threads and connections."""
+        await self.batched_embedder.close()
+        self._encode_pool.shutdown(wait=False)
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        await self.cache.close()
+        await close_http_client()
+    
+    async def clear_cache(self, video_id: Optional[str] = None):
+        """Clear transcript, embedding and search response caches."""
         if video_id:
-            self._transcript_cache.pop(video_id, None)
             self._embedding_cache.pop(video_id, None)
         else:
-            self._transcript_cache.clear()
             self._embedding_cache.clear()
+        self.transcript_service.clear_cache(video_id)
+        await self.cache.clear(video_id)
 
 
-# Singleton instance
-_search_service: Optional[SearchService] = None
-
-
-def get_search_service() -> SearchService:
-    """Get or create the search service singleton."""
-    global _search_service
-    if _search_service is None:
-        _search_service = SearchService()
-    return _search_service
+def get_search_service(request: Request) -> SearchService:
+    """Get the search service created at application startup."""
+    search_service = getattr(request.app.state, "search_service", None)
+    if search_service is None:
+        # Lifespan hasn't run (e.g. app mounted without startup events)
+        search_service = request.app.state.search_service = SearchService()
+    return search_service
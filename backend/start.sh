@@ -0,0 +1,17 @@
+#!/bin/sh
+# Production entrypoint: Gunicorn managing Uvicorn workers (uvloop + httptools).
+#
+# WEB_CONCURRENCY sets the worker count (default: 2 x CPU cores). Each worker
+# loads its own copy of the embedding model, so size it to the memory limit.
+# OMP_NUM_THREADS defaults to 1 so the workers' torch/BLAS thread pools don't
+# oversubscribe the cores between them.
+set -e
+
+export OMP_NUM_THREADS="${OMP_NUM_THREADS:-1}"
+WORKERS="${WEB_CONCURRENCY:-$((2 * $(nproc)))}"
+
+exec gunicorn app.main:app \
+    --worker-class uvicorn.workers.UvicornWorker \
+    --workers "$WORKERS" \
+    --bind "0.0.0.0:${API_PORT:-8000}" \
+    --timeout 120
@@ -0,0 +1,208 @@
+"""
+Tests for the Redis cache, against an in-memory stand-in for redis.asyncio.
+"""
+
+import fnmatch
+import numpy as np
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.services import cache as cache_module
+from app.services.cache import RETRY_AFTER_SECONDS, RedisCache
+from tests.test_search import make_table
+
+
+def to_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakePipeline:
+    """Queues commands and applies them to the fake client on execute."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        for name, args, kwargs in self.commands:
+            await getattr(self.client, name)(*args, **kwargs)
+
+
+class FakeRedis:
+    """The subset of redis.asyncio.Redis that RedisCache uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def append(self, key, value):
+        self.data[key] = self.data.get(key, b"") + to_bytes(value)
+
+    async def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(
+            {to_bytes(field): to_bytes(value) for field, value in mapping.items()}
+        )
+
+    async def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    async def rpush(self, key, value):
+        self.data.setdefault(key, []).append(to_bytes(value))
+
+    async def llen(self, key):
+        return len(self.data.get(key, []))
+
+    async def lindex(self, key, index):
+        values = self.data.get(key, [])
+        return values[index] if index < len(values) else None
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def scan_iter(self, match):
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class FailingRedis:
+    """Client whose every command fails as if Redis were down."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def hgetall(self, key):
+        self.calls += 1
+        raise RedisConnectionError("connection refused")
+
+
+def unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestRedisCache:
+    """Tests for RedisCache."""
+
+    def setup_method(self):
+        self.cache = RedisCache(url="redis://unused", ttl=60, semantic_threshold=0.1)
+        self.cache.enabled = True
+        self.cache._client = FakeRedis()
+
+    @pytest.mark.asyncio
+    async def test_embeddings_round_trip(self):
+        """Test that a stored chunk table loads back column for column."""
+        table = make_table(
+            np.random.default_rng(0).standard_normal((6, 8)),
+            texts=[f"chunk about topic {i}" for i in range(6)],
+        )
+
+        await self.cache.set_embeddings("dQw4w9WgXcQ", table)
+        loaded = await self.cache.get_embeddings("dQw4w9WgXcQ")
+
+        assert loaded.texts == table.texts
+        np.testing.assert_array_equal(loaded.starts, table.starts)
+        np.testing.assert_array_equal(loaded.ends, table.ends)
+        np.testing.assert_array_equal(loaded.embeddings.values, table.embeddings.values)
+        np.testing.assert_array_equal(loaded.embeddings.scales, table.embeddings.scales)
+        np.testing.assert_array_equal(loaded.signatures, table.signatures)
+
+    @pytest.mark.asyncio
+    async def test_embeddings_without_signatures(self):
+        """Test that tables stored without signatures load back without them."""
+        table = make_table(np.eye(3))
+        table.signatures = None
+
+        await self.cache.set_embeddings("dQw4w9WgXcQ", table)
+        loaded = await self.cache.get_embeddings("dQw4w9WgXcQ")
+
+        assert loaded.signatures is None
+        assert loaded.texts == table.texts
+
+    @pytest.mark.asyncio
+    async def test_embeddings_miss(self):
+        """Test that unknown videos and entries in an older layout are misses."""
+        assert await self.cache.get_embeddings("dQw4w9WgXcQ") is None
+
+        self.cache._client.data["clipcontext:embeds:dQw4w9WgXcQ"] = {b"texts": b"[]"}
+        assert await self.cache.get_embeddings("dQw4w9WgXcQ") is None
+
+    @pytest.mark.asyncio
+    async def test_response_distance_threshold(self):
+        """Test that only queries within the cosine distance threshold share a response."""
+        await self.cache.set_response("dQw4w9WgXcQ", 5, unit([1.0, 0.0, 0.0]), '{"a": 1}')
+
+        # Cosine distance about 0.005
+        close = await self.cache.get_response("dQw4w9WgXcQ", 5, unit([1.0, 0.1, 0.0]))
+        # Cosine distance about 0.29
+        far = await self.cache.get_response("dQw4w9WgXcQ", 5, unit([1.0, 0.8, 0.0]))
+        other_limit = await self.cache.get_response("dQw4w9WgXcQ", 3, unit([1.0, 0.0, 0.0]))
+
+        assert close == b'{"a": 1}'
+        assert far is None
+        assert other_limit is None
+
+    @pytest.mark.asyncio
+    async def test_queries_and_responses_stay_aligned(self):
+        """Test that each cached query vector maps to its own response."""
+        queries = [unit(row) for row in np.eye(4)]
+        for i, query in enumerate(queries):
+            await self.cache.set_response("dQw4w9WgXcQ", 5, query * (i + 1), f'{{"i": {i}}}')
+
+        for i, query in enumerate(queries):
+            response = await self.cache.get_response("dQw4w9WgXcQ", 5, query)
+            assert response == f'{{"i": {i}}}'.encode()
+
+    @pytest.mark.asyncio
+    async def test_response_entries_capped(self, monkeypatch):
+        """Test that no responses are added once a video has the maximum."""
+        monkeypatch.setattr(cache_module.settings, "semantic_cache_max_entries", 2)
+        for row in np.eye(3):
+            await self.cache.set_response("dQw4w9WgXcQ", 5, row, "{}")
+
+        assert await self.cache._client.llen("clipcontext:responses:dQw4w9WgXcQ:5") == 2
+        assert await self.cache.get_response("dQw4w9WgXcQ", 5, np.eye(3)[2]) is None
+
+    @pytest.mark.asyncio
+    async def test_clear_one_video(self):
+        """Test that clearing a video leaves other videos' entries."""
+        table = make_table(np.eye(2))
+        await self.cache.set_embeddings("dQw4w9WgXcQ", table)
+        await self.cache.set_embeddings("9bZkp7q19f0", table)
+        await self.cache.set_response("dQw4w9WgXcQ", 5, np.eye(2)[0], "{}")
+
+        await self.cache.clear("dQw4w9WgXcQ")
+
+        assert list(self.cache._client.data) == ["clipcontext:embeds:9bZkp7q19f0"]
+
+    @pytest.mark.asyncio
+    async def test_backoff_after_error(self, monkeypatch):
+        """Test that Redis is not retried until the back-off has passed."""
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        self.cache._client = FailingRedis()
+
+        assert await self.cache.get_embeddings("dQw4w9WgXcQ") is None
+        assert await self.cache.get_embeddings("dQw4w9WgXcQ") is None
+        assert self.cache._client.calls == 1
+
+        now[0] += RETRY_AFTER_SECONDS
+        assert await self.cache.get_embeddings("dQw4w9WgXcQ") is None
+        assert self.cache._client.calls == 2
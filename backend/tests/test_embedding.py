@@ -0,0 +1,250 @@
+"""
+Tests for embedding utilities.
+"""
+
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from app.services import embedding as embedding_module
+from app.services.embedding import (
+    BatchedEmbedder,
+    EmbeddingService,
+    QuantizedEmbeddings,
+    TextChunker,
+)
+
+
+def make_segment(text: str, start: float, duration: float) -> SimpleNamespace:
+    return SimpleNamespace(text=text, start=start, duration=duration)
+
+
+class TestTextChunker:
+    """Tests for TextChunker."""
+
+    def setup_method(self):
+        self.chunker = TextChunker(chunk_size=4, chunk_overlap=2)
+
+    def test_chunk_empty_transcript(self):
+        """Test that no segments produce no chunks."""
+        assert self.chunker.chunk_transcript([]) == []
+
+    def test_chunk_segments_without_words(self):
+        """Test that segments with only whitespace produce no chunks."""
+        segments = [make_segment("  ", 0.0, 1.0)]
+        assert self.chunker.chunk_transcript(segments) == []
+
+    def test_chunk_overlap_windows(self):
+        """Test that chunks are overlapping windows over the words."""
+        segments = [
+            make_segment("one two three", 0.0, 3.0),
+            make_segment("four five six", 3.0, 3.0),
+        ]
+        chunks = self.chunker.chunk_transcript(segments)
+
+        assert [chunk.text for chunk in chunks] == [
+            "one two three four",
+            "three four five six",
+            "five six",
+        ]
+        assert [chunk.chunk_index for chunk in chunks] == [0, 1, 2]
+
+    def test_chunk_timing(self):
+        """Test that chunk times come from word positions within segments."""
+        segments = [
+            make_segment("one two three", 0.0, 3.0),
+            make_segment("four five six", 3.0, 3.0),
+        ]
+        chunks = self.chunker.chunk_transcript(segments)
+
+        # Words are spread evenly over their segment
+        assert chunks[0].start_time == pytest.approx(0.0)
+        assert chunks[1].start_time == pytest.approx(2.0)
+        assert chunks[2].start_time == pytest.approx(4.0)
+        # Chunks end when the segment of their last word ends
+        assert chunks[0].end_time == pytest.approx(6.0)
+        assert chunks[2].end_time == pytest.approx(6.0)
+
+
+class TestQuantizedEmbeddings:
+    """Tests for QuantizedEmbeddings."""
+
+    def test_dot_matches_float_matrix(self):
+        """Test that int8 scoring stays close to float32 scoring."""
+        rng = np.random.default_rng(0)
+        matrix = rng.standard_normal((50, 384)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        query = matrix[7]
+
+        embeddings = QuantizedEmbeddings.from_matrix(matrix)
+
+        assert embeddings.values.dtype == np.int8
+        assert len(embeddings) == 50
+        np.testing.assert_allclose(embeddings.dot(query), matrix @ query, atol=1e-2)
+
+    def test_zero_rows(self):
+        """Test that all-zero rows quantize without dividing by zero."""
+        embeddings = QuantizedEmbeddings.from_matrix(np.zeros((2, 4), dtype=np.float32))
+        np.testing.assert_array_equal(embeddings.dot(np.ones(4, dtype=np.float32)), [0.0, 0.0])
+
+    def test_bytes_round_trip(self):
+        """Test that serialized embeddings load back as read-only views."""
+        rng = np.random.default_rng(0)
+        embeddings = QuantizedEmbeddings.from_matrix(
+            rng.standard_normal((5, 8)).astype(np.float32)
+        )
+
+        loaded = QuantizedEmbeddings.from_bytes(embeddings.to_bytes())
+
+        np.testing.assert_array_equal(loaded.values, embeddings.values)
+        np.testing.assert_array_equal(loaded.scales, embeddings.scales)
+        assert not loaded.values.flags.writeable
+        assert not loaded.scales.flags.writeable
+
+
+class FakeEmbeddingService:
+    """Embedding service stand-in that records each batch it encodes."""
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_texts(self, texts):
+        self.batches.append(list(texts))
+        return np.array([[float(len(text))] for text in texts], dtype=np.float32)
+
+
+class TestBatchedEmbedder:
+    """Tests for BatchedEmbedder."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_a_batch(self):
+        """Test that queries arriving together are encoded in one call."""
+        service = FakeEmbeddingService()
+        embedder = BatchedEmbedder(service, max_batch=8, batch_window_ms=20)
+
+        results = await asyncio.gather(*[embedder.embed("x" * n) for n in range(1, 6)])
+        await embedder.close()
+
+        assert service.batches == [["x", "xx", "xxx", "xxxx", "xxxxx"]]
+        assert [float(r[0]) for r in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped(self):
+        """Test that no batch exceeds max_batch texts."""
+        service = FakeEmbeddingService()
+        embedder = BatchedEmbedder(service, max_batch=2, batch_window_ms=20)
+
+        await asyncio.gather(*[embedder.embed(str(n)) for n in range(5)])
+        await embedder.close()
+
+        assert [len(batch) for batch in service.batches] == [2, 2, 1]
+
+
+class FakeModel:
+    """Sentence encoder stand-in with a deterministic embedding per text."""
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        return np.array(
+            [[len(text), text.count("o"), 1.0] for text in texts], dtype=np.float32
+        )
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+
+class TrackingModel(FakeModel):
+    """FakeModel that records how many encodes run at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def encode(self, texts, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return super().encode(texts, **kwargs)
+
+
+class TestEmbedChunks:
+    """Tests for EmbeddingService.embed_chunks."""
+
+    def setup_method(self):
+        self.service = EmbeddingService()
+        self.service._model = FakeModel()
+        self.chunker = TextChunker(chunk_size=2, chunk_overlap=1)
+        self.segments = [
+            make_segment("one two three", 0.0, 3.0),
+            make_segment("four five six seven", 3.0, 4.0),
+        ]
+
+    def test_batches_match_single_pass(self):
+        """Test that encoding in small batches gives the same table."""
+        whole = self.service.embed_chunks(self.chunker.chunk_transcript(self.segments))
+        batched = self.service.embed_chunks(
+            self.chunker.iter_chunks(self.segments), batch_size=2
+        )
+
+        assert batched.texts == whole.texts
+        np.testing.assert_array_equal(batched.starts, whole.starts)
+        np.testing.assert_array_equal(batched.embeddings.values, whole.embeddings.values)
+
+    def test_signatures_only_for_long_tables(self, monkeypatch):
+        """Test that word signatures are built at index time only above the prefilter size."""
+        short = self.service.embed_chunks(self.chunker.iter_chunks(self.segments))
+        assert short.signatures is None
+
+        monkeypatch.setattr(embedding_module.settings, "prefilter_min_chunks", 2)
+        long = self.service.embed_chunks(
+            self.chunker.iter_chunks(self.segments), batch_size=2
+        )
+        assert long.signatures is not None
+        np.testing.assert_array_equal(long.signatures, short.word_signatures())
+
+    @pytest.mark.asyncio
+    async def test_async_matches_sync(self):
+        """Test that parallel batch encoding gives the same table as embed_chunks."""
+        segments = [make_segment(f"word{n} and more", float(n), 1.0) for n in range(20)]
+        whole = self.service.embed_chunks(self.chunker.iter_chunks(segments))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            parallel = await self.service.embed_chunks_async(
+                self.chunker.iter_chunks(segments), batch_size=3, executor=pool
+            )
+
+        assert parallel.texts == whole.texts
+        np.testing.assert_array_equal(parallel.starts, whole.starts)
+        np.testing.assert_array_equal(parallel.ends, whole.ends)
+        np.testing.assert_array_equal(parallel.embeddings.values, whole.embeddings.values)
+        np.testing.assert_array_equal(parallel.embeddings.scales, whole.embeddings.scales)
+
+    @pytest.mark.asyncio
+    async def test_async_batches_in_flight_bounded(self):
+        """Test that no more than max_in_flight batches are encoded at once."""
+        self.service._model = TrackingModel()
+        segments = [make_segment(f"word{n}", float(n), 1.0) for n in range(40)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            table = await self.service.embed_chunks_async(
+                self.chunker.iter_chunks(segments),
+                batch_size=2,
+                executor=pool,
+                max_in_flight=3,
+            )
+
+        assert len(table) == 40
+        assert 1 < self.service._model.max_active <= 3
+
+    def test_no_chunks(self):
+        """Test that no chunks give an empty table of the model dimension."""
+        table = self.service.embed_chunks(self.chunker.iter_chunks([]))
+
+        assert len(table) == 0
+        assert table.embeddings.values.shape == (0, 3)
@@ -0,0 +1,104 @@
+"""
+Tests for the ONNX Runtime encoder, with stand-ins for the session and tokenizer.
+"""
+
+import numpy as np
+from types import SimpleNamespace
+from app.services.onnx_encoder import OnnxEncoder
+
+
+PAD_ID = 0
+
+
+class FakeTokenizer:
+    """Word tokenizer that pads each batch to its longest text, like tokenizers does."""
+
+    def encode_batch(self, texts):
+        ids = [[len(word) for word in text.split()] for text in texts]
+        length = max(len(row) for row in ids)
+        return [
+            SimpleNamespace(
+                ids=row + [PAD_ID] * (length - len(row)),
+                attention_mask=[1] * len(row) + [0] * (length - len(row)),
+                type_ids=[0] * length,
+            )
+            for row in ids
+        ]
+
+
+class FakeSession:
+    """
+    InferenceSession stand-in whose token embedding is [id, 1, 0].
+
+    Padding tokens embed to a large vector, so any padding that leaks into
+    the pooling changes the result.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def run(self, output_names, feeds):
+        input_ids = feeds["input_ids"]
+        self.batches.append(len(input_ids))
+        tokens = np.stack(
+            [input_ids, np.ones_like(input_ids), np.zeros_like(input_ids)], axis=-1
+        ).astype(np.float32)
+        tokens[input_ids == PAD_ID] = 1000.0
+        return [tokens]
+
+
+def make_encoder() -> OnnxEncoder:
+    # Skip __init__, which loads a real model from disk
+    encoder = OnnxEncoder.__new__(OnnxEncoder)
+    encoder.session = FakeSession()
+    encoder.tokenizer = FakeTokenizer()
+    encoder._input_names = {"input_ids", "attention_mask", "token_type_ids"}
+    encoder._dimension = 3
+    encoder._max_seq_length = 128
+    return encoder
+
+
+def expected_embedding(text: str) -> np.ndarray:
+    """Mean of the [id, 1, 0] token embeddings, L2-normalized."""
+    lengths = [len(word) for word in text.split()]
+    vector = np.array([np.mean(lengths), 1.0, 0.0], dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestOnnxEncoder:
+    """Tests for OnnxEncoder.encode."""
+
+    def setup_method(self):
+        self.encoder = make_encoder()
+
+    def test_output_shapes(self):
+        """Test that a list gives one row per text and a string gives one vector."""
+        texts = ["one", "three words here", "two words"]
+
+        assert self.encoder.encode(texts).shape == (3, 3)
+        assert self.encoder.encode("one").shape == (3,)
+        assert self.encoder.get_sentence_embedding_dimension() == 3
+
+    def test_pooling_ignores_padding(self):
+        """Test that padded tokens carry no weight in the mean pooling."""
+        texts = ["a", "abc de fghi jk"]
+
+        embeddings = self.encoder.encode(texts)
+
+        for text, embedding in zip(texts, embeddings):
+            np.testing.assert_allclose(embedding, expected_embedding(text), rtol=1e-6)
+
+    def test_rows_are_normalized(self):
+        """Test that every embedding has unit length."""
+        embeddings = self.encoder.encode(["a", "bb cc", "ddd e ff"])
+        np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-6)
+
+    def test_batches_split_by_batch_size(self):
+        """Test that texts are run in slices of batch_size, in order."""
+        texts = [" ".join(["x" * (n + 1)] * (n + 1)) for n in range(5)]
+
+        embeddings = self.encoder.encode(texts, batch_size=2)
+
+        assert self.encoder.session.batches == [2, 2, 1]
+        for text, embedding in zip(texts, embeddings):
+            np.testing.assert_allclose(embedding, expected_embedding(text), rtol=1e-6)
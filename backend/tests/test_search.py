@@ -0,0 +1,267 @@
+"""
+Tests for search service similarity ranking.
+"""
+
+import numpy as np
+import pytest
+from app.services.embedding import EmbeddedChunkTable, QuantizedEmbeddings
+from app.services.lexical import lexical_candidates, token_signatures
+from app.services.scoring import cosine_topk
+from app.services import search as search_module
+from app.services.search import SearchService
+from app.models.schemas import SearchRequest, TimestampResult
+from tests.test_embedding import FakeModel
+
+
+def make_table(vectors, texts=None):
+    """Build an embedded chunk table from raw vectors, one chunk per vector."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    starts = np.arange(len(matrix), dtype=np.float64) * 10
+    if texts is None:
+        texts = [f"chunk {i}" for i in range(len(matrix))]
+    return EmbeddedChunkTable(
+        embeddings=QuantizedEmbeddings.from_matrix(matrix),
+        starts=starts,
+        ends=starts + 10,
+        texts=texts,
+        signatures=token_signatures(texts),
+    )
+
+
+class TestSimilaritySearch:
+    """Tests for SearchService._similarity_search."""
+
+    def setup_method(self):
+        self.service = SearchService()
+
+    def test_results_sorted_by_score(self):
+        """Test that the best matching chunks come first."""
+        table = make_table([
+            [1.0, 0.0, 0.0],
+            [0.6, 0.8, 0.0],
+            [0.9, 0.1, 0.0],
+            [0.0, 0.0, 1.0],
+        ])
+        query = np.array([2.0, 0.0, 0.0], dtype=np.float32)
+
+        results = self.service._similarity_search(query, table, max_results=3)
+
+        assert [r.chunk_index for r in results] == [0, 2, 1]
+        assert results[0].score == pytest.approx(1.0, abs=1e-2)
+
+    def test_low_relevance_filtered(self):
+        """Test that chunks below the relevance threshold are dropped."""
+        table = make_table([
+            [1.0, 0.0],
+            [0.0, 1.0],
+        ])
+        query = np.array([1.0, 0.0], dtype=np.float32)
+
+        results = self.service._similarity_search(query, table, max_results=5)
+
+        assert [r.chunk_index for r in results] == [0]
+
+    def test_scores_capped_at_one(self):
+        """Test that a query equal to a chunk embedding scores at most 1.0."""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((200, 384)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        table = make_table(vectors)
+
+        for row in range(len(vectors)):
+            results = self.service._similarity_search(vectors[row], table, max_results=1)
+            assert results[0].chunk_index == row
+            assert results[0].score <= 1.0
+            # Round-trips through the response schema, as the semantic cache does
+            TimestampResult(
+                timestamp_start=0.0,
+                timestamp_end=1.0,
+                timestamp_formatted="0:00",
+                text="chunk",
+                score=results[0].score,
+                youtube_link="https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=0",
+            )
+
+    def test_few_lexical_matches_keep_full_recall(self, monkeypatch):
+        """Test that a paraphrase still wins when only a few chunks share query words."""
+        monkeypatch.setattr(search_module.settings, "prefilter_min_chunks", 10)
+        monkeypatch.setattr(search_module.settings, "prefilter_candidates", 8)
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((40, 16)).astype(np.float32)
+        texts = [f"filler talk {i}" for i in range(40)]
+        for row in range(5):
+            texts[row] = "the river flooded"
+        # Row 30 is the best dense match but shares no words with the query
+        query = vectors[30]
+
+        results = self.service._similarity_search(
+            query, make_table(vectors, texts), max_results=5, query="river flooding"
+        )
+
+        assert results[0].chunk_index == 30
+
+    def test_empty_index(self):
+        """Test that searching no chunks returns no results."""
+        query = np.array([1.0, 0.0], dtype=np.float32)
+        empty = EmbeddedChunkTable(
+            embeddings=QuantizedEmbeddings.from_matrix(np.empty((0, 2), dtype=np.float32)),
+            starts=np.empty(0),
+            ends=np.empty(0),
+            texts=[],
+            signatures=token_signatures([]),
+        )
+        assert self.service._similarity_search(query, empty) == []
+
+
+class TestCosineTopk:
+    """Tests for the cosine_topk scoring kernel."""
+
+    def test_matches_full_sort(self):
+        """Test that top-k agrees with scoring and sorting every row."""
+        rng = np.random.default_rng(0)
+        matrix = rng.standard_normal((300, 16)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        embeddings = QuantizedEmbeddings.from_matrix(matrix)
+        query = matrix[3]
+
+        indices, scores = cosine_topk(embeddings, query, 5)
+
+        expected = np.argsort(-embeddings.dot(query))[:5]
+        assert list(indices) == list(expected)
+        assert list(scores) == sorted(scores, reverse=True)
+        assert indices[0] == 3
+
+
+class TestLexicalCandidates:
+    """Tests for the lexical prefilter."""
+
+    def setup_method(self):
+        self.signatures = token_signatures([
+            "the river flooded the valley",
+            "we built a dam across the river",
+            "cooking pasta at home",
+            "dams and reservoirs store water",
+        ])
+
+    def test_selects_chunks_sharing_words(self):
+        """Test that only chunks with query words are candidates."""
+        candidates = lexical_candidates(
+            self.signatures, "river dam", limit=2
+        )
+        assert list(candidates) == [0, 1]
+
+    def test_limit_keeps_best_matches(self):
+        """Test that the chunks matching most query words are kept."""
+        candidates = lexical_candidates(
+            self.signatures, "river dam", limit=1
+        )
+        assert list(candidates) == [1]
+
+    def test_too_few_matches_falls_back(self):
+        """Test that queries matching fewer chunks than the limit skip the prefilter."""
+        assert lexical_candidates(self.signatures, "river dam", limit=3) is None
+        assert lexical_candidates(self.signatures, "the and", limit=1) is None
+
+
+class StubCache:
+    """RedisCache stand-in that records stored responses."""
+
+    available = True
+
+    def __init__(self, table=None, response=None):
+        self.table = table
+        self.response = response
+        self.stored = []
+        self.table_loads = 0
+
+    async def get_embeddings(self, video_id):
+        self.table_loads += 1
+        return self.table
+
+    async def set_embeddings(self, video_id, chunk_table):
+        self.table = chunk_table
+
+    async def get_response(self, video_id, max_results, query_embedding):
+        return self.response
+
+    async def set_response(self, video_id, max_results, query_embedding, response_json):
+        self.stored.append(response_json)
+
+    async def close(self):
+        pass
+
+
+class TestSearchResponseCaching:
+    """Tests for when SearchService stores responses in the semantic cache."""
+
+    def setup_method(self):
+        self.service = SearchService()
+        self.service.embedding_service._model = FakeModel()
+        self.request = SearchRequest(
+            youtube_url="https://youtu.be/dQw4w9WgXcQ", query="two words", max_results=2
+        )
+
+        async def fetch_transcript(youtube_url):
+            return {
+                "video_id": "dQw4w9WgXcQ",
+                "segments": [
+                    {"text": "one two three", "start": 0.0, "duration": 3.0},
+                    {"text": "four five six", "start": 3.0, "duration": 3.0},
+                ],
+                "source": "youtube-transcript-api",
+            }
+
+        self.service.transcript_service.fetch_transcript = fetch_transcript
+
+    @pytest.mark.asyncio
+    async def test_local_hits_not_stored(self):
+        """Test that only the search that checked the semantic cache is stored."""
+        self.service.cache = StubCache()
+
+        response = await self.service.search(self.request)
+        await self.service.search(self.request)
+        await self.service.close()
+
+        assert self.service.cache.stored == [response.model_dump_json()]
+
+    @pytest.mark.asyncio
+    async def test_semantic_miss_stored(self):
+        """Test that a response is stored after the semantic cache misses."""
+        self.service.cache = StubCache()
+        await self.service.search(self.request)
+        # Another worker: the table is in Redis but not in its local cache
+        self.service._embedding_cache.clear()
+
+        response = await self.service.search(self.request)
+        await self.service.close()
+
+        assert self.service.cache.stored[-1] == response.model_dump_json()
+
+    @pytest.mark.asyncio
+    async def test_redis_table_kept_locally(self):
+        """Test that a table loaded from Redis is not downloaded again."""
+        self.service.cache = StubCache()
+        await self.service.search(self.request)
+        self.service._embedding_cache.clear()
+
+        await self.service.search(self.request)
+        await self.service.search(self.request)
+        await self.service.close()
+
+        assert self.service.cache.table_loads == 2
+
+    @pytest.mark.asyncio
+    async def test_semantic_hit_skips_table(self):
+        """Test that a cached response is served without loading the chunk table."""
+        self.service.cache = StubCache()
+        first = await self.service.search(self.request)
+        self.service._embedding_cache.clear()
+        self.service.cache = StubCache(response=first.model_dump_json())
+
+        response = await self.service.search(self.request)
+        await self.service.close()
+
+        assert response.cached
+        assert response.results == first.results
+        assert self.service.cache.table_loads == 0
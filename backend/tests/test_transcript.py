@@ -2,8 +2,22 @@
 Tests for transcript service.
 """
 
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
 import pytest
-from app.services.transcript import TranscriptService
+from pathlib import Path
+from types import SimpleNamespace
+from app.services.transcript import (
+    Transcript,
+    TranscriptError,
+    TranscriptSegment,
+    TranscriptService,
+    _match_video_id,
+)
 
 
 class TestTranscriptService:
@@ -37,6 +51,39 @@ class TestTranscriptService:
         url = "https://example.com/video"
         assert self.service.extract_video_id(url) is None
     
+    def test_extract_video_id_rejects_long_id(self):
+        """Test that an ID followed by more ID characters is rejected."""
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQX"
+        assert self.service.extract_video_id(url) is None
+    
+    def test_extract_video_id_mobile_url(self):
+        """Test extracting video ID from mobile YouTube URL."""
+        url = "https://m.youtube.com/watch?v=dQw4w9WgXcQ"
+        assert self.service.extract_video_id(url) == "dQw4w9WgXcQ"
+    
+    def test_extract_video_id_subdomain_url(self):
+        """Test extracting video ID from other YouTube subdomains."""
+        url = "https://music.youtube.com/watch?v=dQw4w9WgXcQ"
+        assert self.service.extract_video_id(url) == "dQw4w9WgXcQ"
+    
+    def test_extract_video_id_trailing_slash(self):
+        """Test extracting video ID from a URL ending in a slash."""
+        url = "https://www.youtube.com/embed/dQw4w9WgXcQ/"
+        assert self.service.extract_video_id(url) == "dQw4w9WgXcQ"
+    
+    def test_extract_video_id_surrounding_whitespace(self):
+        """Test that pasted URLs with surrounding whitespace are accepted."""
+        url = " https://youtu.be/dQw4w9WgXcQ \n"
+        assert self.service.extract_video_id(url) == "dQw4w9WgXcQ"
+    
+    def test_extract_video_id_long_input_not_cached(self):
+        """Test that overlong inputs are parsed without being memoized."""
+        _match_video_id.cache_clear()
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&x=" + "a" * 1000
+
+        assert self.service.extract_video_id(url) == "dQw4w9WgXcQ"
+        assert _match_video_id.cache_info().currsize == 0
+    
     def test_extract_video_id_just_id(self):
         """Test extracting when just the ID is provided."""
         video_id = "dQw4w9WgXcQ"
@@ -54,7 +101,185 @@ class TestTranscriptService:
         """Test formatting timestamp with hours."""
         assert self.service.format_timestamp(3725) == "1:02:05"
     
+    def test_format_timestamp_truncates_fraction(self):
+        """Test that fractional seconds are truncated, not rounded."""
+        assert self.service.format_timestamp(59.9999) == "0:59"
+    
     def test_get_youtube_link(self):
         """Test generating YouTube link with timestamp."""
         link = self.service.get_youtube_link("dQw4w9WgXcQ", 125.5)
         assert link == "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=125"
+    
+    def test_get_youtube_links(self):
+        """Test generating YouTube links for several timestamps."""
+        links = self.service.get_youtube_links("dQw4w9WgXcQ", np.array([0.4, 125.5]))
+        assert links == [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=0",
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=125",
+        ]
+
+
+def test_import_stays_light():
+    """Test that importing the transcript module doesn't load scoring or cache dependencies."""
+    # A fresh interpreter, since this test session has imported everything
+    code = (
+        "import sys, app.services.transcript; "
+        "print(sorted({'numba', 'redis', 'fastapi'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+class TestTranscript:
+    """Tests for the Transcript dataclass."""
+
+    def setup_method(self):
+        self.transcript = Transcript.from_dict({
+            "video_id": "dQw4w9WgXcQ",
+            "segments": [
+                {"text": "never gonna", "start": 0.0, "duration": 1.5},
+                {"text": "give you up", "start": 1.5, "duration": 2.0},
+            ],
+            "source": "youtube-transcript-api",
+        })
+
+    def test_full_text(self):
+        """Test that segment texts are joined with spaces."""
+        assert self.transcript.full_text == "never gonna give you up"
+        assert self.transcript.full_text is self.transcript.full_text
+
+    def test_segment_view(self):
+        """Test that single segments are read back from the columns."""
+        assert self.transcript.segment(1) == TranscriptSegment("give you up", 1.5, 2.0)
+        assert self.transcript.segments[0].text == "never gonna"
+
+    def test_duration(self):
+        """Test that duration is the end of the last segment."""
+        assert self.transcript.duration == 3.5
+
+    def test_segment_at(self):
+        """Test that times map to the segment playing at that time."""
+        assert self.transcript.segment_at(0.0) == 0
+        assert self.transcript.segment_at(1.5) == 1
+        assert self.transcript.segment_at(-1.0) == -1
+        assert list(self.transcript.segment_at([0.5, 2.0, 9.0])) == [0, 1, 1]
+
+    def test_segment_containing(self):
+        """Test that times map to the segment whose interval contains them."""
+        assert self.transcript.end_of(0) == 1.5
+        assert self.transcript.segment_containing(1.0) == 0
+        assert self.transcript.segment_containing(1.5) == 1
+        assert list(self.transcript.segment_containing([-1.0, 3.0, 3.5])) == [-1, 1, -1]
+
+    def test_no_instance_dict(self):
+        """Test that transcripts and segments carry no per-instance __dict__."""
+        assert not hasattr(self.transcript, "__dict__")
+        assert not hasattr(self.transcript.segment(0), "__dict__")
+
+
+class FakeTranscriptApi:
+    """youtube-transcript-api stand-in that tracks concurrent fetches."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    def fetch(self, video_id, languages=("en",)):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        snippet = SimpleNamespace(text=f"{video_id} {languages[0]}", start=0.0, duration=1.0)
+        return SimpleNamespace(snippets=[snippet])
+
+
+class TestFetchTranscripts:
+    """Tests for TranscriptService.fetch_transcripts."""
+
+    def setup_method(self):
+        self.service = TranscriptService()
+        self.service.use_serpapi = False
+        self.service.ytt_api = FakeTranscriptApi()
+
+    @pytest.mark.asyncio
+    async def test_results_in_input_order(self):
+        """Test that transcripts come back in the order of the IDs."""
+        video_ids = [f"video{n:06d}" for n in range(5)]
+        transcripts = await self.service.fetch_transcripts(video_ids, languages=["de"])
+
+        assert [t.video_id for t in transcripts] == video_ids
+        assert transcripts[0].texts == ["video000000 de"]
+        # The fake fetch result has no language metadata
+        assert transcripts[0].language == "en"
+        assert not transcripts[0].is_generated
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test that no more than `concurrency` fetches run at once."""
+        video_ids = [f"video{n:06d}" for n in range(8)]
+        await self.service.fetch_transcripts(video_ids, concurrency=3)
+
+        assert 1 < self.service.ytt_api.max_active <= 3
+
+    @pytest.mark.asyncio
+    async def test_default_language_fetches_cached(self):
+        """Test that only default-language fetches are served from cache."""
+        await self.service.fetch_transcripts(["dQw4w9WgXcQ"])
+        await self.service.fetch_transcripts(["dQw4w9WgXcQ"])
+        assert self.service.ytt_api.calls == 1
+
+        await self.service.fetch_transcripts(["dQw4w9WgXcQ"], languages=["de"])
+        await self.service.fetch_transcripts(["dQw4w9WgXcQ"], languages=["de"])
+        assert self.service.ytt_api.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_short_texts_interned(self):
+        """Test that separately fetched short texts share one string object."""
+        first, second = await self.service.fetch_transcripts(
+            ["dQw4w9WgXcQ", "dQw4w9WgXcQ"], languages=["de"]
+        )
+        assert first.texts[0] is second.texts[0]
+
+    @pytest.mark.asyncio
+    async def test_clear_cache_refetches(self):
+        """Test that a cleared video is fetched again and others stay cached."""
+        await self.service.fetch_transcripts(["dQw4w9WgXcQ", "9bZkp7q19f0"])
+        self.service.clear_cache("dQw4w9WgXcQ")
+        await self.service.fetch_transcripts(["dQw4w9WgXcQ", "9bZkp7q19f0"])
+        assert self.service.ytt_api.calls == 3
+
+        self.service.clear_cache()
+        await self.service.fetch_transcripts(["9bZkp7q19f0"])
+        assert self.service.ytt_api.calls == 4
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_waiting_fetches(self):
+        """Test that fetches still waiting for a slot are cancelled after a failure."""
+        video_ids = ["dQw4w9WgXcQ", "not an id!!"] + [f"video{n:06d}" for n in range(4)]
+        with pytest.raises(TranscriptError):
+            await self.service.fetch_transcripts(video_ids, concurrency=1)
+
+        await asyncio.sleep(0.1)
+        assert self.service.ytt_api.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_id_rejected_locally(self):
+        """Test that malformed IDs are rejected without being fetched."""
+        with pytest.raises(TranscriptError) as excinfo:
+            await self.service.fetch_transcripts(["dQw4w9WgXcQ", "not an id!!"])
+
+        assert excinfo.value.code == "INVALID_VIDEO_ID"
+        # Let the valid ID's fetch thread finish before counting
+        await asyncio.sleep(0.1)
+        assert self.service.ytt_api.calls == 1